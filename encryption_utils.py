@@ -5,12 +5,46 @@ Provides secure AES-256-GCM encryption for sensitive data
 
 import os
 import base64
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.backends import default_backend
-import json
-from typing import Union, Dict, Any
+import orjson
+from functools import lru_cache
+from typing import Union, Dict, Any, List
+
+# Leading byte of blobs whose key is derived with HKDF; blobs written before
+# it existed have no marker and use PBKDF2. FORMAT_TYPED blobs also carry a
+# one-byte plaintext type, so decrypting never has to guess JSON vs string.
+FORMAT_HKDF = b'\x01'
+FORMAT_TYPED = b'\x02'
+TYPE_JSON = b'J'
+TYPE_STRING = b'S'
+HKDF_INFO = b'responseai-aes-gcm-v1'
+
+
+@lru_cache(maxsize=1024)
+def _aesgcm(key: bytes) -> AESGCM:
+    """AESGCM instance per derived key, reused when the same blob is read again"""
+    return AESGCM(key)
+
+
+@lru_cache(maxsize=1024)
+def _derive_legacy_key_cached(master_key: bytes, salt: bytes) -> bytes:
+    """
+    PBKDF2 key derivation for legacy blobs, memoized on (master key, salt)
+    so re-reading the same stored blob doesn't pay for 100,000 iterations again
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,  # 256 bits
+        salt=salt,
+        iterations=100000,  # Recommended by OWASP
+        backend=default_backend()
+    )
+    return kdf.derive(master_key)
 
 
 class AESEncryption:
@@ -20,8 +54,9 @@ class AESEncryption:
     
     def __init__(self, master_key: str = None):
         """
-        Initialize with master key (will be derived using PBKDF2)
+        Initialize with master key (per-blob keys are derived using HKDF)
         If no key provided, will look for ENCRYPTION_KEY environment variable
+        The master key should be high-entropy, e.g. from generate_secure_key()
         """
         if master_key is None:
             master_key = os.environ.get('ENCRYPTION_KEY', 'default-key-change-in-production')
@@ -30,56 +65,76 @@ class AESEncryption:
         
     def _derive_key(self, salt: bytes) -> bytes:
         """
-        Derive encryption key from master key using PBKDF2
+        Derive encryption key from master key using HKDF-SHA256
         """
-        kdf = PBKDF2HMAC(
+        hkdf = HKDF(
             algorithm=hashes.SHA256(),
             length=32,  # 256 bits
             salt=salt,
-            iterations=100000,  # Recommended by OWASP
+            info=HKDF_INFO,
             backend=default_backend()
         )
-        return kdf.derive(self.master_key)
+        return hkdf.derive(self.master_key)
+    
+    def _derive_legacy_key(self, salt: bytes) -> bytes:
+        """
+        Derive the key of a legacy (unmarked) blob using PBKDF2
+        """
+        return _derive_legacy_key_cached(self.master_key, salt)
+    
+    @staticmethod
+    def _serialize(data: Union[str, Dict[str, Any]]) -> bytes:
+        """
+        Serialize to JSON if data is dict/object, tagged with its type
+        """
+        if isinstance(data, (dict, list)):
+            return TYPE_JSON + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        return TYPE_STRING + str(data).encode('utf-8')
+    
+    @staticmethod
+    def _seal(aesgcm: AESGCM, salt: bytes, nonce: bytes, plaintext: bytes) -> str:
+        """
+        Encrypt and return base64 of marker + salt + nonce + tag + ciphertext
+        """
+        # AESGCM appends the 16-byte tag to the ciphertext; move it in front
+        # with views and build the blob in a single join
+        sealed = memoryview(aesgcm.encrypt(nonce, plaintext, None))
+        encrypted_data = b"".join((FORMAT_TYPED, salt, nonce, sealed[-16:], sealed[:-16]))
+        return base64.b64encode(encrypted_data).decode('ascii')
     
     def encrypt_data(self, data: Union[str, Dict[str, Any]]) -> str:
         """
         Encrypt data using AES-256-GCM
-        Returns base64 encoded encrypted data with salt and nonce
+        Returns base64 encoded encrypted data with format marker, salt and nonce
         """
         try:
-            # Convert to JSON string if data is dict/object
-            if isinstance(data, (dict, list)):
-                plaintext = json.dumps(data, separators=(',', ':'))
-            else:
-                plaintext = str(data)
+            plaintext = self._serialize(data)
             
-            # Generate random salt and nonce
-            salt = os.urandom(16)  # 128 bits
-            nonce = os.urandom(12)  # 96 bits for GCM
+            # Generate random salt (128 bits) and nonce (96 bits for GCM) in one call
+            random_bytes = os.urandom(28)
+            salt = random_bytes[:16]
+            nonce = random_bytes[16:]
             
-            # Derive key
-            key = self._derive_key(salt)
-            
-            # Create cipher
-            cipher = Cipher(
-                algorithms.AES(key),
-                modes.GCM(nonce),
-                backend=default_backend()
-            )
-            encryptor = cipher.encryptor()
-            
-            # Encrypt data
-            ciphertext = encryptor.update(plaintext.encode('utf-8')) + encryptor.finalize()
-            
-            # Combine salt + nonce + tag + ciphertext
-            encrypted_data = salt + nonce + encryptor.tag + ciphertext
-            
-            # Return base64 encoded
-            return base64.b64encode(encrypted_data).decode('utf-8')
+            return self._seal(AESGCM(self._derive_key(salt)), salt, nonce, plaintext)
             
         except Exception as e:
             raise ValueError(f"Encryption failed: {str(e)}")
     
+    @staticmethod
+    def _open(blob: memoryview, key_for_salt) -> bytes:
+        """
+        Decrypt a salt + nonce + tag + ciphertext blob, deriving the key
+        from its salt with key_for_salt
+        """
+        # Extract components (views into the decoded buffer, not copies)
+        salt = bytes(blob[:16])
+        nonce = blob[16:28]
+        tag = blob[28:44]
+        ciphertext = blob[44:]
+        
+        # AESGCM expects the tag after the ciphertext
+        return _aesgcm(key_for_salt(salt)).decrypt(nonce, b"".join((ciphertext, tag)), None)
+    
     def decrypt_data(self, encrypted_data: str) -> Union[str, Dict[str, Any]]:
         """
         Decrypt AES-256-GCM encrypted data
@@ -87,47 +142,69 @@ class AESEncryption:
         """
         try:
             # Decode from base64
-            encrypted_bytes = base64.b64decode(encrypted_data.encode('utf-8'))
-            
-            # Extract components
-            salt = encrypted_bytes[:16]
-            nonce = encrypted_bytes[16:28]
-            tag = encrypted_bytes[28:44]
-            ciphertext = encrypted_bytes[44:]
+            encrypted_bytes = base64.b64decode(encrypted_data)
+            blob = memoryview(encrypted_bytes)
             
-            # Derive key
-            key = self._derive_key(salt)
+            marker = encrypted_bytes[:1]
+            plaintext = None
+            if marker == FORMAT_TYPED or marker == FORMAT_HKDF:
+                try:
+                    plaintext = self._open(blob[1:], self._derive_key)
+                except InvalidTag:
+                    # A legacy blob whose random salt happens to start with a marker
+                    plaintext = None
+            if plaintext is None:
+                marker = None
+                plaintext = self._open(blob, self._derive_legacy_key)
             
-            # Create cipher
-            cipher = Cipher(
-                algorithms.AES(key),
-                modes.GCM(nonce, tag),
-                backend=default_backend()
-            )
-            decryptor = cipher.decryptor()
+            if marker == FORMAT_TYPED:
+                payload = memoryview(plaintext)[1:]
+                if plaintext[:1] == TYPE_JSON:
+                    return orjson.loads(payload)
+                return str(payload, 'utf-8')
             
-            # Decrypt data
-            plaintext = decryptor.update(ciphertext) + decryptor.finalize()
             decrypted_string = plaintext.decode('utf-8')
             
-            # Try to parse as JSON, fallback to string
+            # Untyped blob: try to parse as JSON, fallback to string
             try:
-                return json.loads(decrypted_string)
-            except json.JSONDecodeError:
+                return orjson.loads(decrypted_string)
+            except orjson.JSONDecodeError:
                 return decrypted_string
                 
         except Exception as e:
             raise ValueError(f"Decryption failed: {str(e)}")
     
+    @staticmethod
+    def _safe_profile(profile_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Remove sensitive fields that shouldn't be encrypted
+        return {k: v for k, v in profile_data.items() 
+                if k not in ['id', 'created_at', 'last_login']}
+    
     def encrypt_user_profile(self, profile_data: Dict[str, Any]) -> str:
         """
         Encrypt user profile data specifically
         """
-        # Remove sensitive fields that shouldn't be encrypted
-        safe_profile = {k: v for k, v in profile_data.items() 
-                       if k not in ['id', 'created_at', 'last_login']}
-        
-        return self.encrypt_data(safe_profile)
+        return self.encrypt_data(self._safe_profile(profile_data))
+    
+    def encrypt_user_profiles_bulk(self, profiles: List[Dict[str, Any]]) -> List[str]:
+        """
+        Encrypt many user profiles with one salt and derived key for the batch
+        Each result has the same layout as encrypt_user_profile, so profiles
+        are still decrypted one at a time with decrypt_user_profile
+        """
+        try:
+            plaintexts = [self._serialize(self._safe_profile(profile)) for profile in profiles]
+            
+            # One salt (and key) per batch; every item still gets its own nonce
+            salt = os.urandom(16)
+            aesgcm = AESGCM(self._derive_key(salt))
+            nonces = memoryview(os.urandom(12 * len(plaintexts)))
+            
+            return [self._seal(aesgcm, salt, nonces[i * 12:(i + 1) * 12], plaintext)
+                    for i, plaintext in enumerate(plaintexts)]
+            
+        except Exception as e:
+            raise ValueError(f"Encryption failed: {str(e)}")
     
     def decrypt_user_profile(self, encrypted_profile: str) -> Dict[str, Any]:
         """
@@ -5,16 +5,177 @@ Provides intelligent review analysis and response generation using Google Gemini
 
 import os
 import json
+import asyncio
 import re
-from typing import Dict, Any, List
+import hashlib
+import string
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
+from response_cache import CacheBackend, RedisBackend, ResponseCache, SemanticCache, SQLiteBackend
+
 try:
     import google.generativeai as genai
+    from google.api_core import exceptions as google_exceptions
     google_ai_available = True
+    # A bad or revoked key; retrying won't help until the key changes
+    AUTH_ERRORS = (google_exceptions.Unauthenticated, google_exceptions.PermissionDenied)
 except ImportError:
     google_ai_available = False
     genai = None
+    AUTH_ERRORS = ()
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+# gRPC keeps one long-lived HTTP/2 channel per process, so calls reuse the
+# TCP+TLS connection instead of handshaking again; "rest" is the fallback
+GEMINI_TRANSPORT = os.environ.get("GEMINI_TRANSPORT", "grpc")
+# Bump when prompts change so persisted results from the old prompts stop matching
+PROMPT_VERSION = "v1"
+# How long generated responses are kept by the persistent cache
+PERSISTENT_CACHE_TTL = 7 * 24 * 3600
+# Most Gemini calls in flight at once from a batch, to stay under the provider's rate limits
+MAX_CONCURRENT_REQUESTS = 16
+
+# Prompt templates, compiled once at import. Edits here need a PROMPT_VERSION bump
+RESPONSE_SYSTEM_TPL = string.Template("""Generate a $tone customer service response to each review you are given.
+
+Brand: $brand_name
+Tone: $tone
+
+Guidelines:
+- Be authentic and personalized
+- Address specific points mentioned
+- Thank the customer appropriately
+- If rating is low (1-2), apologize and offer to make it right
+- If rating is high (4-5), express genuine gratitude
+- Keep response concise but meaningful
+- Match the $tone tone consistently""")
+
+RESPONSE_PROMPT_TPL = string.Template("""Review: "$review_text"
+Rating: $rating/5 stars
+
+Response:""")
+
+SENTIMENT_PROMPT_TPL = string.Template("""Analyze the sentiment of this review. Respond with only: positive, negative, or neutral.
+
+Review: "$review_text"
+
+Sentiment:""")
+
+IMPROVEMENTS_PROMPT_TPL = string.Template("""Based on these customer reviews, provide 3 specific improvement suggestions:
+
+Reviews:
+$reviews_text
+
+Provide 3 actionable improvements:
+1.
+2. 
+3.""")
+
+ISSUES_PROMPT_TPL = string.Template("""Analyze these negative reviews to identify business issues:
+
+$review_text
+
+What specific problems are mentioned? List the top 3 issues and severity level (high/medium/low).""")
+
+# Sentiment analysis keywords, built once at import and shared by every instance
+POSITIVE_WORDS = frozenset({
+    'excellent', 'amazing', 'fantastic', 'perfect', 'outstanding', 'wonderful',
+    'great', 'love', 'best', 'recommend', 'impressed', 'delighted', 'happy',
+    'satisfied', 'quality', 'fast', 'helpful', 'beautiful', 'gorgeous'
+})
+NEGATIVE_WORDS = frozenset({
+    'terrible', 'awful', 'horrible', 'worst', 'disappointed', 'angry',
+    'frustrated', 'broken', 'damaged', 'slow', 'poor', 'cheap', 'useless',
+    'waste', 'refund', 'return', 'complaint', 'issue', 'problem'
+})
+
+
+def _keyword_pattern(words: frozenset) -> re.Pattern:
+    """
+    One alternation matching each keyword at a word start with any suffix, so
+    inflections ("loved", "returned") count; findall yields the keywords hit
+    """
+    return re.compile(r"\b(%s)" % '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+_POSITIVE_RE = _keyword_pattern(POSITIVE_WORDS)
+_NEGATIVE_RE = _keyword_pattern(NEGATIVE_WORDS)
+
+
+class ReviewContext:
+    """
+    Per-review work shared by every method that looks at the same review:
+    the distinct sentiment keywords it contains, and the semantic-cache key
+    (an embedding when sentence-transformers is installed), computed on first
+    use. Methods that take review_text also accept one of these
+    """
+
+    __slots__ = ('text', 'positive_keywords', 'negative_keywords', 'semantic_key')
+
+    def __init__(self, text: str):
+        self.text = text
+        text_lower = text.lower()
+        self.positive_keywords = frozenset(_POSITIVE_RE.findall(text_lower))
+        self.negative_keywords = frozenset(_NEGATIVE_RE.findall(text_lower))
+        self.semantic_key = None
+
+    @classmethod
+    def of(cls, review: Union[str, 'ReviewContext']) -> 'ReviewContext':
+        return review if isinstance(review, cls) else cls(review)
+
+
+_configured_api_key = None
+
+
+def _configure(api_key: str) -> None:
+    """
+    Configure the Gemini client once per process and key. Reconfiguring
+    discards the client and with it the open connection
+    """
+    global _configured_api_key
+    if _configured_api_key != api_key:
+        genai.configure(api_key=api_key, transport=GEMINI_TRANSPORT)
+        _configured_api_key = api_key
+
+
+@dataclass(frozen=True, slots=True)
+class BrandSettings:
+    """
+    The brand settings that shape a response. Immutable and hashable, so one
+    instance per tenant can be reused and keyed on directly
+    """
+    tone: str = 'professional'
+    brand_name: str = 'our business'
+
+    @classmethod
+    def from_dict(cls, settings: Union[Dict, 'BrandSettings']) -> 'BrandSettings':
+        """Shared instance for a settings dict (instances pass through unchanged)"""
+        if isinstance(settings, cls):
+            return settings
+        return _brand_settings(settings.get('tone', 'professional'), settings.get('brand_name', 'our business'))
+
+
+@lru_cache(maxsize=1024)
+def _brand_settings(tone: str, brand_name: str) -> BrandSettings:
+    return BrandSettings(tone, brand_name)
+
+
+@lru_cache(maxsize=256)
+def _response_system_instruction(tone: str, brand_name: str) -> str:
+    """
+    The per-tenant part of the response prompt. Kept byte-identical across
+    calls so the provider can reuse its cached prefix
+    """
+    return RESPONSE_SYSTEM_TPL.substitute(tone=tone, brand_name=brand_name)
+
+
+@lru_cache(maxsize=256)
+def _response_model(tone: str, brand_name: str) -> 'genai.GenerativeModel':
+    """Model handle carrying a tenant's system instruction"""
+    return genai.GenerativeModel(GEMINI_MODEL, system_instruction=_response_system_instruction(tone, brand_name))
 
 
 class GoogleAIService:
@@ -22,15 +183,21 @@ class GoogleAIService:
     Google AI service providing review response generation and analysis
     """
     
+    # "1. ...", "2. ...", "3. ..." lines of a generated suggestion list
+    _SUGGESTION_RE = re.compile(r'^\s*[123]\.[ \t]*(.+?)\s*$', re.MULTILINE)
+    
     def __init__(self, api_key=None):
         self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
         self.model_available = False
+        self._model = None
         
         if self.api_key and google_ai_available:
             try:
-                genai.configure(api_key=self.api_key)
-                # Test if API is working by listing models
-                models = genai.list_models()
+                # No network probe here: the first real request (or test_connection)
+                # validates the key, and an auth failure switches to demo mode
+                _configure(self.api_key)
+                # One model handle reused by every call instead of resolving the model per request
+                self._model = genai.GenerativeModel(GEMINI_MODEL)
                 self.model_available = True
                 print("✅ Google AI initialized successfully")
             except Exception as e:
@@ -39,93 +206,267 @@ class GoogleAIService:
         else:
             print("⚠️ Google AI not available - using demo responses")
         
-        # Sentiment analysis keywords
-        self.sentiment_keywords = {
-            'positive': ['excellent', 'amazing', 'fantastic', 'perfect', 'outstanding', 'wonderful', 
-                        'great', 'love', 'best', 'recommend', 'impressed', 'delighted', 'happy',
-                        'satisfied', 'quality', 'fast', 'helpful', 'beautiful', 'gorgeous'],
-            'negative': ['terrible', 'awful', 'horrible', 'worst', 'disappointed', 'angry',
-                        'frustrated', 'broken', 'damaged', 'slow', 'poor', 'cheap', 'useless',
-                        'waste', 'refund', 'return', 'complaint', 'issue', 'problem']
+        # Identical requests reuse the previous AI result instead of calling the API again
+        self.response_cache = ResponseCache(max_entries=2048, ttl=3600)
+        # Generated responses also outlive worker restarts (and with Redis, are shared by workers)
+        self.persistent_cache = self._persistent_backend() if self.model_available else None
+        # Paraphrased reviews ("great product, fast shipping" vs "Great product and
+        # shipping was fast") reuse a stored result for the same request settings
+        self.semantic_cache = SemanticCache(threshold=0.87)
+        # analyze_sentiment calls answered from keywords alone, to track the skipped model calls
+        self.sentiment_early_exits = 0
+        
+        # Issue labels pulled out of the model's analysis text, in report order
+        self._issue_patterns = {
+            "Delivery/shipping delays": re.compile(r'delivery|shipping', re.IGNORECASE),
+            "Product quality concerns": re.compile(r'quality|defect', re.IGNORECASE),
+            "Customer service issues": re.compile(r'service|support', re.IGNORECASE),
+            "Pricing concerns": re.compile(r'price|cost', re.IGNORECASE)
         }
 
-    def generate_ai_response(self, review_text: str, rating: int, brand_settings: Dict, 
+    @staticmethod
+    def _persistent_backend() -> Optional[CacheBackend]:
+        """Redis when REDIS_URL is set, otherwise a local SQLite file"""
+        try:
+            redis_url = os.environ.get("REDIS_URL")
+            if redis_url:
+                return RedisBackend(redis_url, PROMPT_VERSION)
+            return SQLiteBackend(os.environ.get("LLM_CACHE_DB", "llm_cache.db"), PROMPT_VERSION)
+        except Exception as e:
+            print(f"⚠️ Persistent AI cache unavailable: {e}")
+            return None
+
+    def _cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """In-process cache first, then the persistent one (promoting hits into memory)"""
+        cached = self.response_cache.get(cache_key)
+        if cached is None and self.persistent_cache is not None:
+            cached = self.persistent_cache.get(cache_key)
+            if cached is not None:
+                self.response_cache.set(cache_key, cached)
+        return cached
+
+    def _store_response(self, cache_key: str, result: Dict[str, Any]) -> None:
+        self.response_cache.set(cache_key, result)
+        if self.persistent_cache is not None:
+            self.persistent_cache.set(cache_key, result, PERSISTENT_CACHE_TTL)
+
+    @staticmethod
+    def _cache_key(kind: str, *parts) -> str:
+        """SHA-256 over the model and every input that shapes the prompt"""
+        payload = json.dumps([kind, GEMINI_MODEL, parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def generate_ai_response(self, review_text: Union[str, ReviewContext], rating: int, brand_settings: Union[Dict, BrandSettings],
                            language: str = 'en') -> Dict[str, Any]:
         """Generate AI response using Google AI"""
+        review = ReviewContext.of(review_text)
+        review_text = review.text
         
         if not self.model_available:
-            return self._generate_demo_response(review_text, rating, brand_settings)
+            return self._generate_demo_response(review, rating, brand_settings)
         
         try:
             # Create a detailed prompt for Google AI
-            tone = brand_settings.get('tone', 'professional')
-            brand_name = brand_settings.get('brand_name', 'our business')
+            brand = BrandSettings.from_dict(brand_settings)
+            tone, brand_name = brand.tone, brand.brand_name
             
-            prompt = f"""Generate a {tone} customer service response to this review:
-
-Review: "{review_text}"
-Rating: {rating}/5 stars
-Brand: {brand_name}
-Tone: {tone}
-
-Guidelines:
-- Be authentic and personalized
-- Address specific points mentioned
-- Thank the customer appropriately
-- If rating is low (1-2), apologize and offer to make it right
-- If rating is high (4-5), express genuine gratitude
-- Keep response concise but meaningful
-- Match the {tone} tone consistently
-
-Response:"""
+            cache_key = self._cache_key('response', review_text, rating, tone, brand_name, language)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return dict(cached)
             
-            response = genai.generate_text(
-                model='models/text-bison-001',
-                prompt=prompt,
-                temperature=0.7,
-                max_output_tokens=150
-            )
+            semantic_scope = ('response', rating, tone, brand_name, language)
+            semantic_key = self._semantic_key(review)
+            similar = self.semantic_cache.get(semantic_scope, semantic_key)
+            if similar is not None:
+                result, similarity = similar
+                # A reused answer is only as trustworthy as the match it came from
+                return dict(result, confidence=round(result['confidence'] * similarity, 2))
             
-            if response.result:
-                return {
-                    "response": response.result.strip(),
+            prompt = RESPONSE_PROMPT_TPL.substitute(review_text=review_text, rating=rating)
+            
+            text = self._generate(prompt, temperature=0.7, max_output_tokens=150,
+                                  model=_response_model(tone, brand_name))
+            
+            if text:
+                result = {
+                    "response": text,
                     "confidence": 0.92,
                     "tone": tone,
-                    "sentiment": self._analyze_sentiment(review_text),
+                    "sentiment": self._analyze_sentiment(review),
                     "ai_powered": True,
-                    "model": "google-palm"
+                    "model": GEMINI_MODEL
                 }
+                self._store_response(cache_key, result)
+                self.semantic_cache.set(semantic_scope, semantic_key, result)
+                return dict(result)
             else:
-                return self._generate_demo_response(review_text, rating, brand_settings)
+                return self._generate_demo_response(review, rating, brand_settings)
             
         except Exception as e:
             print(f"Google AI error: {e}")
-            return self._generate_demo_response(review_text, rating, brand_settings)
+            return self._generate_demo_response(review, rating, brand_settings)
 
-    def analyze_sentiment(self, review_text: str) -> Dict[str, Any]:
-        """Analyze sentiment of review text"""
+    def stream_ai_response(self, review_text: Union[str, ReviewContext], rating: int, brand_settings: Union[Dict, BrandSettings],
+                           language: str = 'en') -> Iterator[str]:
+        """
+        Yield response text as Gemini produces it, so callers can forward the
+        first words before the whole reply is done. Cached and demo responses
+        come back as a single chunk; only a stream that ran to the end is cached
+        """
+        review = ReviewContext.of(review_text)
+        review_text = review.text
+        brand = BrandSettings.from_dict(brand_settings)
+        tone, brand_name = brand.tone, brand.brand_name
         
         if not self.model_available:
-            return self._analyze_sentiment_basic(review_text)
+            yield self._generate_demo_response(review, rating, brand_settings)["response"]
+            return
+        
+        cache_key = self._cache_key('response', review_text, rating, tone, brand_name, language)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            yield cached["response"]
+            return
         
+        chunks = []
+        completed = False
         try:
-            prompt = f"""Analyze the sentiment of this review. Respond with only: positive, negative, or neutral.
+            prompt = RESPONSE_PROMPT_TPL.substitute(review_text=review_text, rating=rating)
+            stream = _response_model(tone, brand_name).generate_content(
+                prompt,
+                generation_config=genai.GenerationConfig(temperature=0.7, max_output_tokens=150),
+                stream=True
+            )
+            for chunk in stream:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Blocked or empty candidate
+                    break
+                if text:
+                    chunks.append(text)
+                    yield text
+            else:
+                completed = True
+        except AUTH_ERRORS as e:
+            print(f"Google AI streaming error: {e}")
+            self._disable_on_auth_error()
+        except Exception as e:
+            print(f"Google AI streaming error: {e}")
+        
+        if not chunks:
+            yield self._generate_demo_response(review, rating, brand_settings)["response"]
+            return
+        if not completed:
+            # Partial text was already sent; don't let a later request reuse it
+            return
+        
+        result = {
+            "response": "".join(chunks).strip(),
+            "confidence": 0.92,
+            "tone": tone,
+            "sentiment": self._analyze_sentiment(review),
+            "ai_powered": True,
+            "model": GEMINI_MODEL
+        }
+        self._store_response(cache_key, result)
+        self.semantic_cache.set(('response', rating, tone, brand_name, language),
+                                self._semantic_key(review), result)
 
-Review: "{review_text}"
+    def _semantic_key(self, review: ReviewContext) -> Any:
+        """Semantic-cache key for the review, embedded at most once per context"""
+        if review.semantic_key is None:
+            review.semantic_key = self.semantic_cache.key_for(review.text)
+        return review.semantic_key
 
-Sentiment:"""
-            
-            response = genai.generate_text(
-                model='models/text-bison-001',
-                prompt=prompt,
-                temperature=0.3,
-                max_output_tokens=10
+    def _disable_on_auth_error(self) -> None:
+        """Fall back to demo responses until test_connection succeeds again"""
+        if self.model_available:
+            print("❌ Google AI rejected the API key - using demo responses")
+        self.model_available = False
+
+    def _generate(self, prompt: str, temperature: Optional[float] = None, max_output_tokens: int = 150,
+                  model: Any = None) -> str:
+        """Run one prompt on the shared (or given) model handle; empty string when nothing usable came back"""
+        try:
+            response = (model or self._model).generate_content(
+                prompt,
+                generation_config=genai.GenerationConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens
+                )
             )
+        except AUTH_ERRORS:
+            self._disable_on_auth_error()
+            raise
+        try:
+            return response.text.strip()
+        except ValueError:
+            # Raised by .text when the candidate was blocked or has no parts
+            return ""
+
+    async def agenerate_ai_response(self, review_text: str, rating: int, brand_settings: Union[Dict, BrandSettings],
+                                    language: str = 'en') -> Dict[str, Any]:
+        """Async generate_ai_response; the blocking client call runs in a worker thread"""
+        return await asyncio.to_thread(self.generate_ai_response, review_text, rating, brand_settings, language)
+
+    async def generate_ai_responses_batch(self, items: List[Tuple[str, int, Union[Dict, BrandSettings]]],
+                                          language: str = 'en') -> List[Dict[str, Any]]:
+        """
+        Generate responses for many (review_text, rating, brand_settings) items
+        concurrently, returned in input order
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def generate(review_text: str, rating: int, brand_settings: Union[Dict, BrandSettings]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.agenerate_ai_response(review_text, rating, brand_settings, language)
+
+        results = await asyncio.gather(*(generate(*item) for item in items), return_exceptions=True)
+        # generate_ai_response already falls back to demo responses; this covers anything else
+        return [
+            self._generate_demo_response(*item) if isinstance(result, Exception) else result
+            for item, result in zip(items, results)
+        ]
+
+    def analyze_sentiment(self, review_text: Union[str, ReviewContext]) -> Dict[str, Any]:
+        """Analyze sentiment of review text"""
+        review = ReviewContext.of(review_text)
+        review_text = review.text
+        
+        if not self.model_available:
+            return self._analyze_sentiment_basic(review)
+        
+        # Very short or clearly one-sided reviews don't need the model
+        positive_count, negative_count = self._sentiment_counts(review)
+        if positive_count + negative_count == 0 and len(review_text.strip()) < 20:
+            self.sentiment_early_exits += 1
+            return self._sentiment_result("neutral", 0.7)
+        if abs(positive_count - negative_count) >= 3:
+            self.sentiment_early_exits += 1
+            return self._sentiment_result(self._sentiment_label(positive_count, negative_count), 0.9)
+        
+        cache_key = self._cache_key('sentiment', review_text)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        try:
+            semantic_key = self._semantic_key(review)
+            similar = self.semantic_cache.get('sentiment', semantic_key)
+            if similar is not None:
+                result, similarity = similar
+                return dict(result, confidence=round(result['confidence'] * similarity, 2))
+            
+            prompt = SENTIMENT_PROMPT_TPL.substitute(review_text=review_text)
+            
+            text = self._generate(prompt, temperature=0.3, max_output_tokens=10)
             
-            if response.result:
-                sentiment = response.result.strip().lower()
+            if text:
+                sentiment = text.lower()
                 if sentiment in ['positive', 'negative', 'neutral']:
-                    return {
+                    result = {
                         "sentiment": sentiment,
                         "confidence": 0.85,
                         "emotions": [sentiment],
@@ -133,12 +474,15 @@ Sentiment:"""
                         "key_phrases": [],
                         "ai_powered": True
                     }
+                    self.response_cache.set(cache_key, result)
+                    self.semantic_cache.set('sentiment', semantic_key, result)
+                    return dict(result)
             
-            return self._analyze_sentiment_basic(review_text)
+            return self._analyze_sentiment_basic(review)
                 
         except Exception as e:
             print(f"Google AI sentiment analysis error: {e}")
-            return self._analyze_sentiment_basic(review_text)
+            return self._analyze_sentiment_basic(review)
 
     def generate_improvements(self, reviews: List[Dict]) -> Dict[str, Any]:
         """Generate improvement suggestions based on reviews"""
@@ -154,39 +498,30 @@ Sentiment:"""
             
             reviews_text = "\n".join(review_summary)
             
-            prompt = f"""Based on these customer reviews, provide 3 specific improvement suggestions:
-
-Reviews:
-{reviews_text}
-
-Provide 3 actionable improvements:
-1.
-2. 
-3."""
+            # Keyed on the summarized reviews themselves (and the count reported back)
+            cache_key = self._cache_key('improvements', reviews_text, len(reviews))
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
             
-            response = genai.generate_text(
-                model='models/text-bison-001',
-                prompt=prompt,
-                temperature=0.7,
-                max_output_tokens=200
-            )
+            prompt = IMPROVEMENTS_PROMPT_TPL.substitute(reviews_text=reviews_text)
+            
+            text = self._generate(prompt, temperature=0.7, max_output_tokens=200)
             
-            if response.result:
-                suggestions_text = response.result.strip()
+            if text:
                 # Parse the numbered suggestions
-                suggestions = []
-                for line in suggestions_text.split('\n'):
-                    if line.strip() and (line.strip().startswith(('1.', '2.', '3.'))):
-                        suggestions.append(line.strip()[2:].strip())
+                suggestions = self._SUGGESTION_RE.findall(text)[:3]
                 
-                return {
+                result = {
                     "product_improvements": suggestions[:1] if suggestions else ["Improve product quality based on feedback"],
                     "service_improvements": suggestions[1:2] if len(suggestions) > 1 else ["Enhance customer service response"],
                     "experience_improvements": suggestions[2:3] if len(suggestions) > 2 else ["Streamline customer experience"],
                     "ai_powered": True,
                     "based_on_reviews": len(reviews),
-                    "model": "google-palm"
+                    "model": GEMINI_MODEL
                 }
+                self.response_cache.set(cache_key, result)
+                return dict(result)
             else:
                 return self._generate_demo_improvements()
                 
@@ -194,7 +529,8 @@ Provide 3 actionable improvements:
             print(f"Google AI improvements error: {e}")
             return self._generate_demo_improvements()
 
-    def _generate_demo_response(self, review_text: str, rating: int, brand_settings: Dict) -> Dict[str, Any]:
+    def _generate_demo_response(self, review_text: Union[str, ReviewContext], rating: int,
+                                brand_settings: Union[Dict, BrandSettings]) -> Dict[str, Any]:
         """Generate demo response when AI is not available"""
         if rating >= 4:
             response = f"Thank you so much for your wonderful {rating}-star review! We're thrilled that you had such a positive experience with us."
@@ -206,19 +542,24 @@ Provide 3 actionable improvements:
         return {
             "response": response,
             "confidence": 0.75,
-            "tone": brand_settings.get('tone', 'professional'),
+            "tone": BrandSettings.from_dict(brand_settings).tone,
             "sentiment": self._analyze_sentiment(review_text),
             "ai_powered": False,
             "demo_mode": True
         }
 
-    def _analyze_sentiment(self, review_text: str) -> str:
+    def _sentiment_counts(self, review_text: Union[str, ReviewContext]) -> Tuple[int, int]:
+        """Distinct positive and negative keywords in the review"""
+        review = ReviewContext.of(review_text)
+        return len(review.positive_keywords), len(review.negative_keywords)
+
+    def _analyze_sentiment(self, review_text: Union[str, ReviewContext]) -> str:
         """Basic sentiment analysis"""
-        text_lower = review_text.lower()
-        
-        positive_count = sum(1 for word in self.sentiment_keywords['positive'] if word in text_lower)
-        negative_count = sum(1 for word in self.sentiment_keywords['negative'] if word in text_lower)
-        
+        positive_count, negative_count = self._sentiment_counts(review_text)
+        return self._sentiment_label(positive_count, negative_count)
+
+    @staticmethod
+    def _sentiment_label(positive_count: int, negative_count: int) -> str:
         if positive_count > negative_count:
             return "positive"
         elif negative_count > positive_count:
@@ -226,7 +567,7 @@ Provide 3 actionable improvements:
         else:
             return "neutral"
 
-    def _analyze_sentiment_basic(self, review_text: str) -> Dict[str, Any]:
+    def _analyze_sentiment_basic(self, review_text: Union[str, ReviewContext]) -> Dict[str, Any]:
         """Basic sentiment analysis fallback"""
         sentiment = self._analyze_sentiment(review_text)
         
@@ -240,6 +581,18 @@ Provide 3 actionable improvements:
             "demo_mode": True
         }
 
+    @staticmethod
+    def _sentiment_result(sentiment: str, confidence: float) -> Dict[str, Any]:
+        """Keyword verdict returned without calling the model"""
+        return {
+            "sentiment": sentiment,
+            "confidence": confidence,
+            "emotions": [sentiment],
+            "aspects": {"overall": sentiment},
+            "key_phrases": [],
+            "ai_powered": False
+        }
+
     def _generate_demo_improvements(self) -> Dict[str, Any]:
         """Demo improvement suggestions"""
         return {
@@ -284,7 +637,12 @@ Provide 3 actionable improvements:
         try:
             # Analyze recent negative reviews
             recent_reviews = reviews[-15:]  # Last 15 reviews
-            negative_reviews = [r for r in recent_reviews if int(r.get('review_rating', 5)) <= 2]
+            # One pass: each rating is converted once and the prompt line built alongside it
+            negative_reviews = [
+                f"Rating: {rating}/5 - {r.get('review_text', '')}"
+                for r in recent_reviews
+                if (rating := int(r.get('review_rating') or 5)) <= 2
+            ]
             
             if len(negative_reviews) == 0:
                 return {
@@ -295,35 +653,17 @@ Provide 3 actionable improvements:
                     "analysis_complete": True
                 }
             
-            review_text = "\n".join([f"Rating: {r.get('review_rating')}/5 - {r.get('review_text', '')}" 
-                                   for r in negative_reviews])
+            review_text = "\n".join(negative_reviews)
             
-            prompt = f"""Analyze these negative reviews to identify business issues:
-
-{review_text}
-
-What specific problems are mentioned? List the top 3 issues and severity level (high/medium/low)."""
+            prompt = ISSUES_PROMPT_TPL.substitute(review_text=review_text)
             
-            response = genai.generate_text(
-                model='models/text-bison-001',
-                prompt=prompt,
-                temperature=0.3,
-                max_output_tokens=150
-            )
+            text = self._generate(prompt, temperature=0.3, max_output_tokens=150)
             
-            if response.result:
-                analysis = response.result.strip()
+            if text:
+                analysis = text
                 
                 # Extract issues from response
-                issues = []
-                if "delivery" in analysis.lower() or "shipping" in analysis.lower():
-                    issues.append("Delivery/shipping delays")
-                if "quality" in analysis.lower() or "defect" in analysis.lower():
-                    issues.append("Product quality concerns")
-                if "service" in analysis.lower() or "support" in analysis.lower():
-                    issues.append("Customer service issues")
-                if "price" in analysis.lower() or "cost" in analysis.lower():
-                    issues.append("Pricing concerns")
+                issues = [label for label, pattern in self._issue_patterns.items() if pattern.search(analysis)]
                 
                 severity = "high" if len(negative_reviews) > 5 else "medium" if len(negative_reviews) > 2 else "low"
                 
@@ -375,22 +715,20 @@ What specific problems are mentioned? List the top 3 issues and severity level (
             }
         
         try:
-            genai.configure(api_key=self.api_key)
+            _configure(self.api_key)
+            if self._model is None:
+                self._model = genai.GenerativeModel(GEMINI_MODEL)
             
             # Test with simple prompt
-            response = genai.generate_text(
-                model='models/text-bison-001',
-                prompt="Say 'Google AI test successful'",
-                max_output_tokens=10
-            )
+            text = self._generate("Say 'Google AI test successful'", max_output_tokens=10)
             
-            if response.result:
+            if text:
                 self.model_available = True
                 return {
                     "status": "success",
                     "message": "Google AI connection successful",
-                    "test_response": response.result.strip(),
-                    "model": "text-bison-001",
+                    "test_response": text,
+                    "model": GEMINI_MODEL,
                     "available": True
                 }
             else:
@@ -0,0 +1,110 @@
+"""
+OpenAI Request Pool for ResponseAI Platform
+Proactive RPM/TPM throttling and retry with backoff around a shared OpenAI client
+"""
+
+import random
+import time
+from threading import BoundedSemaphore, Lock
+from typing import Any, Dict, List
+
+try:
+    import openai
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError)
+except ImportError:
+    openai = None
+    RETRYABLE_ERRORS = ()
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class _TokenBucket:
+    """
+    Capacity refilled continuously at per_minute / 60 units per second
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (0 if it already is)"""
+        return max(0.0, (amount - self.available) / self.rate)
+
+
+class RateLimitedClient:
+    """
+    Thread-safe wrapper that waits for request and token capacity before
+    calling OpenAI, instead of sending bursts that come back as 429s
+    """
+
+    def __init__(self, client, requests_per_minute: int = 3500, tokens_per_minute: int = 90000,
+                 max_concurrency: int = 8, max_retries: int = 5):
+        self.client = client
+        self.max_retries = max_retries
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._encodings = {}
+
+    def estimate_tokens(self, model: str, messages: List[Dict[str, str]], max_tokens: int, n: int = 1) -> int:
+        """Prompt tokens plus the most the completion(s) can use"""
+        text = ''.join(message.get('content', '') for message in messages)
+        if tiktoken is not None:
+            encoding = self._encodings.get(model)
+            if encoding is None:
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("cl100k_base")
+                self._encodings[model] = encoding
+            prompt_tokens = len(encoding.encode(text))
+        else:
+            prompt_tokens = len(text) // 4  # ~4 characters per token for English
+        # Per-message formatting overhead
+        prompt_tokens += 4 * len(messages)
+        return prompt_tokens + max_tokens * n
+
+    def _acquire(self, tokens: int) -> None:
+        # A single request larger than the bucket would otherwise wait forever
+        tokens = min(tokens, self._tokens.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._requests.refill(now)
+                self._tokens.refill(now)
+                wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+                if wait == 0:
+                    self._requests.available -= 1
+                    self._tokens.available -= tokens
+                    return
+            time.sleep(wait)
+
+    def chat_completion(self, **kwargs) -> Any:
+        """
+        chat.completions.create with throttling; rate-limit and connection
+        errors are retried with exponential backoff and jitter
+        """
+        tokens = self.estimate_tokens(kwargs.get('model', ''), kwargs.get('messages', []),
+                                      kwargs.get('max_tokens', 0), kwargs.get('n', 1))
+        attempt = 0
+        while True:
+            self._acquire(tokens)
+            try:
+                with self._slots:
+                    return self.client.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30) + random.random())
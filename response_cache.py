@@ -0,0 +1,287 @@
+"""
+Response Cache for ResponseAI Platform
+In-process LRU cache for generated review responses, keyed on normalized review text,
+plus SQLite/Redis backends that keep AI results across restarts and workers
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock, local
+from typing import Any, Dict, Hashable, Optional, Protocol, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9']+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase and collapse punctuation/whitespace so near-duplicate reviews
+    ("Love it!!" vs "love it") share a cache key
+    """
+    return _NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+
+class SemanticCache:
+    """
+    Reuse values for paraphrased texts. With sentence-transformers installed,
+    a text matches a cached one when their normalized embeddings have cosine
+    similarity >= threshold; otherwise texts match on normalize_text().
+    Entries only match within the same scope (e.g. rating and brand voice).
+    """
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', threshold: float = 0.87,
+                 max_scopes: int = 256, max_entries_per_scope: int = 256):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_scopes = max_scopes
+        self.max_entries_per_scope = max_entries_per_scope
+        self.semantic = SentenceTransformer is not None
+        self._model = None
+        self._lock = Lock()
+        # scope -> {"entries": OrderedDict(key -> (vector, value)), "matrix": stacked vectors or None}
+        self._scopes = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, text: str) -> Any:
+        """Lookup key for a text: its embedding, or the normalized text as a fallback"""
+        if not self.semantic:
+            return normalize_text(text)
+        with self._lock:
+            # Loaded on first use so importing the app doesn't pay for the model
+            if self._model is None:
+                self._model = SentenceTransformer(self.model_name)
+            model = self._model
+        return model.encode(text, normalize_embeddings=True)
+
+    def get(self, scope: Hashable, key: Any) -> Optional[Tuple[Any, float]]:
+        """Return (value, similarity) for the closest cached text in scope, or None"""
+        with self._lock:
+            bucket = self._scopes.get(scope)
+            match = None
+            if bucket is not None:
+                self._scopes.move_to_end(scope)
+                match = self._search(bucket, key)
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry_key, similarity = match
+            bucket["entries"].move_to_end(entry_key)
+            return bucket["entries"][entry_key][1], similarity
+
+    def set(self, scope: Hashable, key: Any, value: Any) -> None:
+        with self._lock:
+            bucket = self._scopes.get(scope)
+            if bucket is None:
+                bucket = self._scopes[scope] = {"entries": OrderedDict(), "matrix": None}
+                while len(self._scopes) > self.max_scopes:
+                    self._scopes.popitem(last=False)
+            self._scopes.move_to_end(scope)
+
+            if self.semantic:
+                entry_key = self._next_id
+                self._next_id += 1
+                bucket["entries"][entry_key] = (key, value)
+            else:
+                bucket["entries"][key] = (None, value)
+                bucket["entries"].move_to_end(key)
+            while len(bucket["entries"]) > self.max_entries_per_scope:
+                bucket["entries"].popitem(last=False)
+            bucket["matrix"] = None
+
+    def _search(self, bucket: Dict[str, Any], key: Any) -> Optional[Tuple[Hashable, float]]:
+        entries = bucket["entries"]
+        if not self.semantic:
+            return (key, 1.0) if key in entries else None
+        if not entries:
+            return None
+        # Stacked lazily and reused until the scope changes
+        if bucket["matrix"] is None:
+            bucket["matrix"] = (list(entries), np.stack([vector for vector, _ in entries.values()]))
+        entry_keys, matrix = bucket["matrix"]
+        scores = matrix @ key
+        best = int(scores.argmax())
+        similarity = float(scores[best])
+        if similarity < self.threshold:
+            return None
+        return entry_keys[best], similarity
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "semantic": self.semantic,
+                "scopes": len(self._scopes),
+                "entries": sum(len(bucket["entries"]) for bucket in self._scopes.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class CacheBackend(Protocol):
+    """Persistent store for JSON-serializable AI results, keyed on a request hash"""
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        ...
+
+
+class SQLiteBackend:
+    """
+    Cache table in a local SQLite file. Survives worker restarts; shared by
+    workers on the same host. Rows from another prompt version never match
+    """
+
+    def __init__(self, path: str, prompt_version: str):
+        self.path = path
+        self.prompt_version = prompt_version
+        self._local = local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                input_hash TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                response TEXT NOT NULL,
+                expires_at INTEGER NOT NULL,
+                PRIMARY KEY (input_hash, prompt_version)
+            );
+            -- Lets the prune on every write find expired rows without a table scan
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_expires_at ON llm_cache(expires_at);
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = self._connection().execute(
+                "SELECT response FROM llm_cache WHERE input_hash = ? AND prompt_version = ? AND expires_at > ?",
+                (key, self.prompt_version, int(time.time()))
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (input_hash, prompt_version, response, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, self.prompt_version, json.dumps(value), int(time.time() + ttl))
+                )
+                # Expired rows are only pruned on write, so reads stay a single lookup
+                conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (int(time.time()),))
+        except sqlite3.Error as e:
+            logger.warning("LLM cache write failed: %s", e)
+
+
+class RedisBackend:
+    """
+    Cache entries in Redis, shared by every worker and host pointing at it.
+    Expiry is left to Redis; the prompt version is part of the key
+    """
+
+    def __init__(self, url: str, prompt_version: str):
+        if redis is None:
+            raise RuntimeError("redis package is not installed")
+        self.prompt_version = prompt_version
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, key: str) -> str:
+        return f"llm_cache:{self.prompt_version}:{key}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self._client.get(self._key(key))
+        except redis.RedisError as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return None
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        try:
+            self._client.set(self._key(key), json.dumps(value), ex=int(ttl))
+        except redis.RedisError as e:
+            logger.warning("LLM cache write failed: %s", e)
@@ -61,12 +61,8 @@ function ReviewList() {
       axios.post('/webhook/new-review', newReview)
         .then(res => {
           console.log('Simulated webhook sent:', res.data);
-          // Update state to reflect new review and AI draft
-          setReviews(prevReviews => [{
-            ...newReview,
-            ai_draft: res.data.ai_reply_draft || "Could not generate reply.",
-            ai_response: res.data.ai_reply_draft || "Could not generate reply."
-          }, ...prevReviews]);
+          // The draft is generated in the background; reload once it's ready
+          setTimeout(fetchReviews, 2000);
         })
         .catch(err => console.error('Simulated webhook error:', err));
     };